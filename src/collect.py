@@ -1,17 +1,27 @@
+import heapq
 import json
+import mmap
+import os
+import re
 import time
-from dataclasses import dataclass, asdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from hashlib import sha256
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import feedparser
-import requests
-from dateutil import parser as dtparser
+from urllib3.util.retry import Retry
 
-from tagger import is_relevant_startup_news
-from utils import strip_html, safe_url
+from tagger import STARTUP_FILTER_RE, is_relevant_startup_news
+from utils import make_session, strip_html, safe_url, norm_url
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback, same output just slower
+    orjson = None
 
 ROOT = Path(__file__).resolve().parents[1]
 FEEDS_PATH = ROOT / "feeds.json"
@@ -20,6 +30,21 @@ STATE_PATH = DATA_DIR / "state.json"
 
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
+MAX_FETCH_WORKERS = 16
+# load_json maps files at least this big instead of reading them into memory
+MMAP_MIN_BYTES = 1 << 20
+# cap for seen_ids/sent_ids in state.json, oldest dropped first
+MAX_TRACKED_IDS = 5000
+# (connect, read): an unreachable host fails fast instead of holding a worker for the full read timeout
+FETCH_TIMEOUT = (5, 25)
+# http_cache keeps only this many best unseen candidates per feed: state.json is
+# committed back every run, so it has to stay small
+CACHE_ITEMS_PER_FEED = 3
+
+# one pooled session for all feeds: keep-alive across runs of fetch_feed,
+# plus a couple of retries for flaky connections
+SESSION = make_session(pool_size=32, retry=Retry(total=2, backoff_factor=0.3))
+
 @dataclass
 class Item:
     id: str
@@ -29,144 +54,263 @@ class Item:
     url: str
     published_at: Optional[str]
     summary: str
+    # epoch seconds of published_at (0 if unknown): cheap int sort key
+    published_ts: int = 0
+
+def item_to_dict(it: Item) -> Dict[str, Any]:
+    # Item only holds scalars, so a shallow copy gives what asdict()'s recursive
+    # deep copy would, without the per-field reflection
+    return dict(vars(it))
 
 def load_json(path: Path, default: Any) -> Any:
     if not path.exists():
         return default
-    return json.loads(path.read_text(encoding="utf-8"))
+    if orjson is None:
+        return json.loads(path.read_text(encoding="utf-8"))
+    if path.stat().st_size >= MMAP_MIN_BYTES:
+        # parse straight from the page cache instead of copying into a bytes object first
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as mv:
+            return orjson.loads(mv)
+    return orjson.loads(path.read_bytes())
 
 def save_json(path: Path, obj: Any) -> None:
-    path.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+    if orjson is None:
+        data = json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+    else:
+        data = orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    # write-then-rename: a run killed mid-write never leaves a truncated state.json
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+def load_state() -> Dict[str, Any]:
+    return load_json(STATE_PATH, {"sent_ids": [], "seen_ids": [], "updated_at": None})
+
+def save_state(state: Dict[str, Any]) -> None:
+    save_json(STATE_PATH, state)
+
+def load_ids(raw: Any) -> List[str]:
+    # ids in posting order; older state.json kept {id: timestamp}, but the
+    # timestamps were never read and dict order is already chronological
+    return list(raw or [])
+
+def prune_ids(ids: List[str], keep: int = MAX_TRACKED_IDS) -> List[str]:
+    # feeds only expose their latest ~40 entries, so an id this far back can't reappear
+    return ids[-keep:]
 
 def make_id(url: str, source: str) -> str:
+    # ids are persisted in state.json (seen_ids/sent_ids/http_cache): changing the
+    # hash or its inputs would make every already-posted item look new again
     base = f"{source}||{url}"
     return sha256(base.encode("utf-8")).hexdigest()[:20]
 
-def parse_datetime(entry: Dict[str, Any]) -> Optional[str]:
+def _parse_dt_str(s: str) -> datetime:
+    # cheapest parser for the format first: RFC 2822 (RSS pubDate), then
+    # RFC 3339 (Atom; fromisoformat takes a trailing "Z" as of 3.11, which the
+    # workflow pins), and only then dateutil's generic parser
+    try:
+        return parsedate_to_datetime(s)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(s)
+    except ValueError:
+        from dateutil import parser as dtparser
+        return dtparser.parse(s)
+
+def parse_datetime(entry: Dict[str, Any]) -> Optional[datetime]:
     for key in ("published", "updated", "created"):
         if entry.get(key):
             try:
-                dt = dtparser.parse(entry[key])
+                dt = _parse_dt_str(entry[key])
                 if not dt.tzinfo:
                     dt = dt.replace(tzinfo=timezone.utc)
-                return dt.astimezone(timezone.utc).isoformat()
-            except Exception:
+                return dt.astimezone(timezone.utc)
+            except (ValueError, OverflowError, TypeError):
                 pass
     for key in ("published_parsed", "updated_parsed"):
         if entry.get(key):
             try:
-                dt = datetime.fromtimestamp(time.mktime(entry[key]), tz=timezone.utc)
-                return dt.isoformat()
-            except Exception:
+                return datetime.fromtimestamp(time.mktime(entry[key]), tz=timezone.utc)
+            except (ValueError, OverflowError, OSError, TypeError):
                 pass
     return None
 
-def fetch_feed(url: str, timeout: int = 25) -> feedparser.FeedParserDict:
-    headers = {"User-Agent": "latam-startup-bot/1.0"}
-    r = requests.get(url, headers=headers, timeout=timeout)
+def fetch_feed(url: str, cache_entry: Dict[str, Any], timeout: Tuple[int, int] = FETCH_TIMEOUT) -> Optional[feedparser.FeedParserDict]:
+    """Conditional GET of a feed. Returns None on 304 (feed unchanged since the
+    cached validators); on 200 refreshes etag/last_modified in cache_entry."""
+    headers = {}
+    if "items" in cache_entry:
+        if cache_entry.get("etag"):
+            headers["If-None-Match"] = cache_entry["etag"]
+        if cache_entry.get("last_modified"):
+            headers["If-Modified-Since"] = cache_entry["last_modified"]
+
+    r = SESSION.get(url, headers=headers, timeout=timeout)
+    if r.status_code == 304:
+        return None
     r.raise_for_status()
-    return feedparser.parse(r.content)
+
+    cache_entry["etag"] = r.headers.get("ETag")
+    cache_entry["last_modified"] = r.headers.get("Last-Modified")
+    # summaries go through strip_html anyway, so skip feedparser's HTML sanitizer
+    # and relative-URI rewriting
+    return feedparser.parse(r.content, sanitize_html=False, resolve_relative_uris=False)
+
+def parse_entries(feed: feedparser.FeedParserDict, name: str, hint: str, seen_urls: Set[str]) -> List[Item]:
+    out: List[Item] = []
+    for entry in (feed.entries or [])[:40]:
+        title = (entry.get("title") or "").strip()
+        link = safe_url(entry.get("link") or "")
+        if not title or not link:
+            continue
+
+        summ = strip_html(entry.get("summary") or entry.get("description") or "")
+        summ = summ[:800]
+
+        blob = f"{title} {summ}"
+        if not is_relevant_startup_news(blob):
+            continue
+
+        # same article syndicated by several sources: only the first relevant copy counts
+        key = norm_url(link)
+        if key in seen_urls:
+            continue
+        seen_urls.add(key)
+
+        item_id = make_id(link, name)
+        dt = parse_datetime(entry)
+
+        out.append(Item(
+            id=item_id,
+            source=name,
+            country_hint=hint,
+            title=title,
+            url=link,
+            published_at=dt.isoformat() if dt else None,
+            summary=summ,
+            published_ts=int(dt.timestamp()) if dt else 0
+        ))
+    return out
+
+# score weight -> signal keywords; fused into one alternation so score_item
+# scans the text once instead of once per keyword
+SCORE_SIGNALS: List[Tuple[int, List[str]]] = [
+    (3, ["raised", "raises", "funding", "series", "seed", "investment", "acquired", "acquisition", "expands", "launches",
+         "inversión", "ronda", "financiación", "levantó", "adquirió", "expande", "desembarca"]),
+    (2, ["factory", "manufacturing", "plant", "production", "planta", "fábrica", "producción"]),
+]
+SCORE_WEIGHTS: Dict[str, int] = {k: weight for weight, keys in SCORE_SIGNALS for k in keys}
+# zero-width lookahead, longest keyword first: finditer tries every position and
+# reports the longest keyword starting there. Any other keyword starting at the
+# same spot is a prefix of it ("plant" in "planta"), so each hit also credits its
+# prefixes -- the same distinct-keyword count as a `w in text` loop
+SCORE_RE = re.compile("(?=(" + "|".join(re.escape(k) for k in sorted(SCORE_WEIGHTS, key=len, reverse=True)) + "))")
+SCORE_PREFIXES: Dict[str, List[str]] = {k: [p for p in SCORE_WEIGHTS if k.startswith(p)] for k in SCORE_WEIGHTS}
 
 def score_item(title: str, summary: str) -> int:
     text = f"{title} {summary}".lower()
-    score = 0
-    # signals
-    for w in ["raised", "raises", "funding", "series", "seed", "investment", "acquired", "acquisition", "expands", "launches"]:
-        if w in text:
-            score += 3
-    for w in ["inversión", "ronda", "financiación", "levantó", "adquirió", "expande", "desembarca"]:
-        if w in text:
-            score += 3
-    for w in ["factory", "manufacturing", "plant", "production", "planta", "fábrica", "producción"]:
-        if w in text:
-            score += 2
-    # startup relevance
-    if is_relevant_startup_news(text):
+    # each distinct keyword counts once, weighted by its group
+    hits = {p for m in SCORE_RE.finditer(text) for p in SCORE_PREFIXES[m.group(1)]}
+    score = sum(SCORE_WEIGHTS[k] for k in hits)
+    # startup relevance (text is already lowercased, so skip the wrapper's .lower())
+    if STARTUP_FILTER_RE.search(text):
         score += 5
     return score
 
-def pick_one_new(items: List[Item], seen_ids: Dict[str, str]) -> Optional[Item]:
-    # sort by score then date
-    def dtkey(it: Item):
-        return it.published_at or ""
+def rank_key(it: Item) -> Tuple[int, int]:
+    return score_item(it.title, it.summary), it.published_ts
 
-    items_sorted = sorted(items, key=lambda x: (score_item(x.title, x.summary), dtkey(x)), reverse=True)
-    for it in items_sorted:
-        if it.id not in seen_ids:
-            return it
-    return None
+def pick_one_new(items: List[Item], seen_ids: Set[str]) -> Optional[Item]:
+    # best unseen item by score then date: one pass over the unseen ones,
+    # no sort and no intermediate list
+    fresh = (it for it in items if it.id not in seen_ids)
+    return max(fresh, key=rank_key, default=None)
 
-def main() -> Optional[Dict[str, Any]]:
+def cache_items(items: List[Item], skip_ids: Set[str]) -> List[Dict[str, Any]]:
+    # the few candidates a 304 can still offer next run, stored whole: a cached
+    # pick feeds Groq and the tag backstops just like a fresh one
+    best = heapq.nlargest(CACHE_ITEMS_PER_FEED, (it for it in items if it.id not in skip_ids), key=rank_key)
+    return [item_to_dict(it) for it in best]
+
+def main(now: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+    # run.py passes its own start time so both state writes carry the same stamp
+    now = now or datetime.now(timezone.utc)
     cfg = load_json(FEEDS_PATH, {})
     sources = cfg.get("sources", [])
     if not sources:
         raise RuntimeError("feeds.json has no sources")
 
-    state = load_json(STATE_PATH, {"sent_ids": {}, "seen_ids": {}, "updated_at": None})
-    seen_ids = state.get("seen_ids", {}) or {}
+    state = load_state()
+    seen_list = load_ids(state.get("seen_ids"))
+    seen_ids = set(seen_list)
+
+    # url -> {"etag", "last_modified", "items"}: validators for conditional GETs
+    # plus the feed's best few unseen items, reused when it answers 304
+    old_cache = state.get("http_cache", {}) or {}
 
     collected: List[Item] = []
+    feed_items: Dict[str, List[Item]] = {}
+    seen_urls: Set[str] = set()
     ok = 0
     fail = 0
 
-    for src in sources:
+    # feeds are I/O-bound: fetch them all in parallel over one pooled session,
+    # then walk the results in source order on the main thread
+    sources = [src for src in sources if src.get("url")]
+    http_cache = {src["url"]: dict(old_cache.get(src["url"], {})) for src in sources}
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_FETCH_WORKERS, len(sources)))) as ex:
+        futures = [(src, ex.submit(fetch_feed, src["url"], http_cache[src["url"]])) for src in sources]
+
+    for src, fut in futures:
         name = src.get("name", "Unknown")
         hint = src.get("country_hint", "LATAM")
-        url = src.get("url")
-        if not url:
-            continue
+        url = src["url"]
 
         try:
-            feed = fetch_feed(url)
+            feed = fut.result()
             ok += 1
         except Exception as e:
             fail += 1
             print(f"[WARN] feed fail: {name}: {e}")
+            http_cache[url] = old_cache.get(url, {})
             continue
 
-        for entry in (feed.entries or [])[:40]:
-            title = (entry.get("title") or "").strip()
-            link = safe_url(entry.get("link") or "")
-            if not title or not link:
-                continue
+        if feed is None:
+            items = []
+            for d in http_cache[url].get("items", []):
+                key = norm_url(d["url"])
+                if key not in seen_urls:
+                    seen_urls.add(key)
+                    items.append(Item(**d))
+        else:
+            items = parse_entries(feed, name, hint, seen_urls)
+        collected.extend(items)
+        feed_items[url] = items
 
-            summ = strip_html(entry.get("summary") or entry.get("description") or "")
-            summ = summ[:800]
-
-            blob = f"{title} {summ}"
-            if not is_relevant_startup_news(blob):
-                continue
-
-            item_id = make_id(link, name)
-            published_at = parse_datetime(entry)
+    chosen = pick_one_new(collected, seen_ids)
 
-            collected.append(Item(
-                id=item_id,
-                source=name,
-                country_hint=hint,
-                title=title,
-                url=link,
-                published_at=published_at,
-                summary=summ
-            ))
+    skip_ids = seen_ids | {chosen.id} if chosen else seen_ids
+    for url, items in feed_items.items():
+        http_cache[url]["items"] = cache_items(items, skip_ids)
+    state["http_cache"] = {u: e for u, e in http_cache.items() if "items" in e}
 
     if not collected:
         print(f"[WARN] Collected 0 relevant items (feeds ok={ok}, fail={fail}).")
-        return None
-
-    chosen = pick_one_new(collected, seen_ids)
-    if not chosen:
+    elif not chosen:
         print("No new items (all already seen).")
-        return None
-
-    # mark as seen immediately to avoid duplicates next run
-    seen_ids[chosen.id] = datetime.now(timezone.utc).isoformat()
-    state["seen_ids"] = seen_ids
-    state["updated_at"] = datetime.now(timezone.utc).isoformat()
-    save_json(STATE_PATH, state)
+    else:
+        # mark as seen immediately to avoid duplicates next run
+        seen_list.append(chosen.id)
+        state["seen_ids"] = prune_ids(seen_list)
+        state["updated_at"] = now.isoformat()
+        print(f"Chosen: {chosen.source} :: {chosen.title}")
 
-    print(f"Chosen: {chosen.source} :: {chosen.title}")
-    return asdict(chosen)
+    # single write per run, and none at all on a quiet tick (nothing chosen, every
+    # feed 304/failed): the file is also what the workflow commits back
+    if chosen or state["http_cache"] != old_cache:
+        save_state(state)
+    return item_to_dict(chosen) if chosen else None
 
 if __name__ == "__main__":
     main()
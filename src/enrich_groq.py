@@ -1,8 +1,8 @@
 import json
-import requests
 from typing import Dict, Any
 
 from tagger import detect_country, detect_events, detect_sectors
+from utils import make_session
 
 SYSTEM = (
     "Ты — аналитик венчурного рынка и бизнес-редактор. "
@@ -20,6 +20,9 @@ MODEL_CANDIDATES = [
     "llama3-70b-8192",
 ]
 
+# общая сессия: при переборе моделей TLS-соединение с Groq переиспользуется
+SESSION = make_session()
+
 def _groq_chat(api_key: str, user_prompt: str) -> str:
     api_key = (api_key or "").strip()
     if not api_key:
@@ -44,11 +47,14 @@ def _groq_chat(api_key: str, user_prompt: str) -> str:
         }
 
         try:
-            r = requests.post(GROQ_URL, headers=headers, json=payload, timeout=60)
+            r = SESSION.post(GROQ_URL, headers=headers, json=payload, timeout=60)
 
             # Если ошибка — покажем тело, но попробуем следующую модель
             if r.status_code != 200:
                 last_err = f"[Groq {r.status_code}] model={model} body={r.text[:1200]}"
+                # ключ невалиден для всех моделей — не тратим лишние запросы
+                if r.status_code in (401, 403):
+                    break
                 continue
 
             data = r.json()
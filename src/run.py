@@ -1,42 +1,41 @@
 import os
-import json
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 
-from collect import main as collect_one
-from enrich_groq import enrich_with_groq
+from collect import main as collect_one, load_ids, load_state, prune_ids, save_state
 from tagger import flag, detect_sectors, detect_events, detect_country
-from utils import extract_og_image
-from telegram import (
-    download_image,
-    generate_fallback_image,
-    build_caption_html,
-    send_telegram_post
-)
 
-ROOT = Path(__file__).resolve().parents[1]
-STATE_PATH = ROOT / "data" / "state.json"
+def fetch_og_image_bytes(url):
+    from utils import extract_og_image
+    from telegram import download_image
 
-def load_state():
-    if not STATE_PATH.exists():
-        return {"sent_ids": {}, "seen_ids": {}, "updated_at": None}
-    return json.loads(STATE_PATH.read_text(encoding="utf-8"))
-
-def save_state(st):
-    STATE_PATH.write_text(json.dumps(st, ensure_ascii=False, indent=2), encoding="utf-8")
+    og = extract_og_image(url)
+    return download_image(og) if og else None
 
 def main():
     token = os.environ["TELEGRAM_BOT_TOKEN"]
     chat_id = os.environ["TELEGRAM_CHAT_ID"]
     groq_key = os.environ["GROQ_API_KEY"]
+    now = datetime.now(timezone.utc)
 
-    item = collect_one()
+    item = collect_one(now)
     if not item:
         print("No item to post.")
         return
 
-    # Groq enrich
-    item = enrich_with_groq(item, groq_key)
+    # posting deps (Pillow, bs4) are only imported once there is something to post
+    from enrich_groq import enrich_with_groq
+    from telegram import (
+        generate_fallback_image,
+        build_caption_html,
+        send_telegram_post
+    )
+
+    # Groq enrich, with the og:image lookup + download running alongside it
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        img_future = ex.submit(fetch_og_image_bytes, item["url"])
+        item = enrich_with_groq(item, groq_key)
+        img_bytes = img_future.result()
 
     # country flag
     c = item.get("country", "LATAM")
@@ -52,8 +51,6 @@ def main():
         item["country"] = detect_country(blob, hint=item.get("country_hint","LATAM"))
 
     # image
-    og = extract_og_image(item["url"])
-    img_bytes = download_image(og) if og else None
     if not img_bytes:
         img_bytes = generate_fallback_image(cflag, item.get("title",""), item["industry_tags"] + item["event_tags"])
 
@@ -70,11 +67,13 @@ def main():
 
     # mark as sent (extra safety)
     st = load_state()
-    sent = st.get("sent_ids", {}) or {}
-    sent[item["id"]] = datetime.now(timezone.utc).isoformat()
-    st["sent_ids"] = sent
-    st["updated_at"] = datetime.now(timezone.utc).isoformat()
-    save_state(st)
+    sent = load_ids(st.get("sent_ids"))
+    # only rewrite state.json if the id is actually new
+    if item["id"] not in sent:
+        sent.append(item["id"])
+        st["sent_ids"] = prune_ids(sent)
+        st["updated_at"] = now.isoformat()
+        save_state(st)
 
     print("Posted OK.")
 
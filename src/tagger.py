@@ -1,4 +1,5 @@
 import re
+from functools import lru_cache
 from typing import Dict, List, Tuple
 
 # ISO2 -> flag emoji
@@ -59,33 +60,67 @@ STARTUP_FILTER_HINTS = [
     "inversión", "ronda", "financiación", "levantó", "adquirió", "acuerdo"
 ]
 
+_Fused = Tuple["re.Pattern[str]", Dict[str, Tuple[int, ...]]]
+
+def _fuse_rules(rules: List[Tuple[str, List[str]]]) -> _Fused:
+    # every rule's keywords in one zero-width lookahead, longest first: finditer
+    # tries each position and reports the longest keyword starting there. Any
+    # other keyword starting at the same spot is a prefix of it, so each keyword
+    # credits every rule owning one of its prefixes ("aid" also counts for "ai");
+    # same result as any(k in t) per rule, like collect.SCORE_PREFIXES
+    keys = {k for _, ks in rules for k in ks}
+    rx = re.compile("(?=(" + "|".join(re.escape(k) for k in sorted(keys, key=len, reverse=True)) + "))")
+    credit = {k: tuple(i for i, (_, ks) in enumerate(rules) if any(k.startswith(p) for p in ks)) for k in keys}
+    return rx, credit
+
+def _rule_hits(fused: _Fused, t: str) -> List[int]:
+    # indexes of the rules that matched, in rule order
+    rx, credit = fused
+    return sorted({i for m in rx.finditer(t) for i in credit[m.group(1)]})
+
+COUNTRY_RULES: List[Tuple[str, List[str]]] = list(COUNTRY_KEYWORDS.items())
+COUNTRY_RE = _fuse_rules(COUNTRY_RULES)
+SECTOR_RE = _fuse_rules(SECTOR_RULES)
+EVENT_RE = _fuse_rules(EVENT_RULES)
+
+# enrich_groq and run.py both fall back to these heuristics on the same
+# title+summary blob, so memoize them per text
+
+@lru_cache(maxsize=4096)
 def detect_country(text: str, hint: str = "LATAM") -> str:
     t = (text or "").lower()
-    for iso2, keys in COUNTRY_KEYWORDS.items():
-        if any(k in t for k in keys):
-            return iso2
+    hits = _rule_hits(COUNTRY_RE, t)
+    if hits:
+        return COUNTRY_RULES[hits[0]][0]
     # fallback to hint if it looks like ISO2
     h = (hint or "").upper()
     if len(h) == 2 and h.isalpha():
         return h
     return "LATAM"
 
+@lru_cache(maxsize=4096)
+def _detect_sectors(text: str) -> Tuple[str, ...]:
+    t = (text or "").lower()
+    out = [SECTOR_RULES[i][0] for i in _rule_hits(SECTOR_RE, t)]
+    return tuple(out[:3]) if out else ("Tech",)
+
 def detect_sectors(text: str) -> List[str]:
+    # fresh list per call: callers mutate/concatenate it, the cache holds a tuple
+    return list(_detect_sectors(text))
+
+@lru_cache(maxsize=4096)
+def _detect_events(text: str) -> Tuple[str, ...]:
     t = (text or "").lower()
-    out = []
-    for sector, keys in SECTOR_RULES:
-        if any(k in t for k in keys):
-            out.append(sector)
-    return out[:3] if out else ["Tech"]
+    out = [EVENT_RULES[i][0] for i in _rule_hits(EVENT_RE, t)]
+    return tuple(out[:2]) if out else ("News",)
 
 def detect_events(text: str) -> List[str]:
-    t = (text or "").lower()
-    out = []
-    for ev, keys in EVENT_RULES:
-        if any(k in t for k in keys):
-            out.append(ev)
-    return out[:2] if out else ["News"]
+    return list(_detect_events(text))
+
+# one alternation instead of a substring scan per hint; plain substrings, no
+# word boundaries, so it matches exactly what the old any(k in t) did
+STARTUP_FILTER_RE = re.compile("|".join(re.escape(k) for k in STARTUP_FILTER_HINTS))
 
 def is_relevant_startup_news(text: str) -> bool:
     t = (text or "").lower()
-    return any(k in t for k in STARTUP_FILTER_HINTS)
+    return STARTUP_FILTER_RE.search(t) is not None
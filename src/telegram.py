@@ -1,52 +1,53 @@
 import io
-import requests
+import textwrap
 from PIL import Image, ImageDraw, ImageFont
+from urllib3.util.retry import Retry
 
-from utils import escape_html
+from utils import SESSION as HTTP_SESSION, escape_html, make_session
+
+# keep-alive session for sendPhoto (the og:image download uses utils' GET
+# session); only failed connects and 429s are retried, where Telegram never got
+# or refused the request. Read timeouts / dropped responses are not: the photo
+# may already be posted
+SESSION = make_session(pool_size=4, retry=Retry(
+    total=2, read=False, other=0, backoff_factor=0.3, status_forcelist=[429],
+    allowed_methods=frozenset({"POST"}), raise_on_status=False,
+))
+
+# default PIL font (no extra files); loaded once, not per banner
+_FONT = ImageFont.load_default()
+_BANNER_SIZE = (1200, 630)
+_BG_TEMPLATE = Image.new("RGB", _BANNER_SIZE, (20, 24, 32))
 
 def generate_fallback_image(country_flag: str, title: str, tags: list[str]) -> bytes:
-    # Safe RGB PNG
-    w, h = 1200, 630
-    img = Image.new("RGB", (w, h), (20, 24, 32))
+    # Safe RGB JPEG
+    w, h = _BANNER_SIZE
+    img = _BG_TEMPLATE.copy()
     draw = ImageDraw.Draw(img)
 
-    # default PIL font (no extra files)
-    font_big = ImageFont.load_default()
-    font_small = ImageFont.load_default()
-
     # Header
-    draw.text((40, 40), f"{country_flag} LATAM Startup Update", fill=(240, 240, 240), font=font_big)
+    draw.text((40, 40), f"{country_flag} LATAM Startup Update", fill=(240, 240, 240), font=_FONT)
 
     # Title (wrap)
-    t = title.strip()
-    lines = []
-    max_len = 56
-    while len(t) > max_len:
-        cut = t[:max_len]
-        sp = cut.rfind(" ")
-        if sp <= 0:
-            sp = max_len
-        lines.append(t[:sp])
-        t = t[sp:].strip()
-    if t:
-        lines.append(t)
-
+    lines = textwrap.wrap(title.strip(), width=55, max_lines=7, placeholder="",
+                          break_on_hyphens=False)
     y = 120
-    for ln in lines[:7]:
-        draw.text((40, y), ln, fill=(220, 220, 220), font=font_big)
+    for ln in lines:
+        draw.text((40, y), ln, fill=(220, 220, 220), font=_FONT)
         y += 34
 
     # Tags
     tag_line = " ".join([f"#{x}" for x in tags[:6]])
-    draw.text((40, h - 70), tag_line, fill=(120, 200, 255), font=font_small)
+    draw.text((40, h - 70), tag_line, fill=(120, 200, 255), font=_FONT)
 
     buf = io.BytesIO()
-    img.save(buf, format="PNG")
+    # JPEG encodes faster and uploads smaller than PNG; Telegram recompresses photos anyway
+    img.save(buf, format="JPEG", quality=85)
     return buf.getvalue()
 
 def download_image(url: str, timeout: int = 25) -> bytes | None:
     try:
-        r = requests.get(url, timeout=timeout, headers={"User-Agent": "latam-startup-bot/1.0"})
+        r = HTTP_SESSION.get(url, timeout=timeout)
         r.raise_for_status()
         # Telegram likes jpeg/png; we just pass bytes, most og:image is OK
         if len(r.content) < 5000:
@@ -57,23 +58,45 @@ def download_image(url: str, timeout: int = 25) -> bytes | None:
 
 def send_telegram_post(token: str, chat_id: str, image_bytes: bytes, caption_html: str) -> None:
     api = f"https://api.telegram.org/bot{token}/sendPhoto"
-    files = {"photo": ("image.png", image_bytes)}
+    # Telegram sniffs the real type from the bytes (og:image may be PNG/WebP)
+    files = {"photo": ("image.jpg", image_bytes)}
     data = {
         "chat_id": chat_id,
         "caption": caption_html,
         "parse_mode": "HTML",
         "disable_web_page_preview": True
     }
-    r = requests.post(api, data=data, files=files, timeout=60)
+    r = SESSION.post(api, data=data, files=files, timeout=60)
     if r.status_code != 200:
         raise RuntimeError(f"Telegram sendPhoto failed: {r.text}")
 
+# Telegram caps photo captions at 1024 characters of visible text (markup and
+# entities excluded, counted in UTF-16 units); an over-long caption is a 400
+CAPTION_LIMIT = 1024
+
+def _tg_len(s: str) -> int:
+    return len(s.encode("utf-16-le")) // 2
+
+def _clip(s: str, limit: int) -> str:
+    if _tg_len(s) <= limit:
+        return s
+    if limit <= 0:
+        return ""
+    # cut by code points, then back off for any astral (2-unit) characters
+    s = s[:limit - 1]
+    while _tg_len(s) > limit - 1:
+        s = s[:-1]
+    return s.rstrip() + "…"
+
 def build_caption_html(country_flag: str, ru_summary: str, ru_insight: str, url: str, industry_tags: list[str], event_tags: list[str]) -> str:
     # Classic channel post
-    tags = []
-    tags += [f"#{t}" for t in industry_tags]
-    tags += [f"#{t}" for t in event_tags]
-    tags_str = " ".join(tags)
+    tags_str = " ".join(f"#{t}" for t in (*industry_tags, *event_tags))
+
+    # trim the plain text before escaping, so a cut never lands inside an entity;
+    # the insight gives way first
+    budget = CAPTION_LIMIT - _tg_len(f"{country_flag} \n\n\n\n🔗 Источник\n{tags_str}")
+    ru_summary = _clip(ru_summary, budget)
+    ru_insight = _clip(ru_insight, budget - _tg_len(ru_summary))
 
     ru_summary = escape_html(ru_summary)
     ru_insight = escape_html(ru_insight)